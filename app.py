@@ -1,11 +1,11 @@
 import os
-from datetime import datetime
-from flask import Flask, render_template, request, redirect, url_for, send_file, flash, abort, session
+from datetime import datetime, date
+from flask import Flask, render_template, request, redirect, url_for, send_file, flash, abort, session, g
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from flask_bcrypt import Bcrypt
-import pandas as pd
-from io import BytesIO
+from flask_caching import Cache
+from cachetools import TTLCache
 
 # --- CONFIGURATION ---
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -22,11 +22,17 @@ if database_url and database_url.startswith("postgres://"):
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url or 'sqlite:///' + os.path.join(basedir, 'edulog.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Neon drops idle connections; keep a small pre-pinged pool so requests re-use
+# warm TLS connections instead of paying a fresh handshake per query.
+if database_url:
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': 6, 'max_overflow': 4, 'pool_pre_ping': True, 'pool_recycle': 300}
+
 # Explicitly expose the app for Vercel's builder
 app = app 
 
 db = SQLAlchemy(app)
 bcrypt = Bcrypt(app)
+cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache'})
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 
@@ -43,11 +49,13 @@ class User(UserMixin, db.Model):
     role = db.Column(db.String(20), nullable=False)
     department = db.Column(db.String(50))
     designation = db.Column(db.String(50))
+    assigned = db.relationship('Task', foreign_keys='Task.assigner_id', back_populates='assigned_by')
 
 class Meeting(db.Model):
+    __table_args__ = (db.Index('ix_meeting_dept_date', 'department', 'date_of_meeting'), db.Index('ix_meeting_date', 'date_of_meeting'))
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, default=datetime.now)
-    date_of_meeting = db.Column(db.String(20))
+    date_of_meeting = db.Column(db.Date)
     department = db.Column(db.String(50))
     department_head = db.Column(db.String(50))
     meeting_type = db.Column(db.String(50))
@@ -58,6 +66,8 @@ class Meeting(db.Model):
     end_time = db.Column(db.String(20))
     attendees = db.Column(db.Text)
     absentees = db.Column(db.Text)
+    attendee_count = db.Column(db.Integer, default=0)
+    absentee_count = db.Column(db.Integer, default=0)
     key_decisions = db.Column(db.Text)
     action_items = db.Column(db.Text)
     productive = db.Column(db.String(20))
@@ -65,21 +75,27 @@ class Meeting(db.Model):
     submitted_by = db.Column(db.String(50))
 
 class Task(db.Model):
+    __table_args__ = (db.Index('ix_task_assignee_status', 'assignee_id', 'status'), db.Index('ix_task_assigner_id', 'assigner_id'))
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    assigner = db.Column(db.String(50))     
-    assignee = db.Column(db.String(50))     
+    assigner = db.Column(db.String(50))
+    assigner_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    assigned_by = db.relationship('User', foreign_keys=[assigner_id], back_populates='assigned')
+    assignee = db.Column(db.String(50))
+    assignee_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    assigned_to = db.relationship('User', foreign_keys=[assignee_id], lazy='selectin')
     department = db.Column(db.String(50))   
-    deadline = db.Column(db.String(20))
+    deadline = db.Column(db.Date)
     status = db.Column(db.String(20), default='Pending')
     completion_date = db.Column(db.String(20))
 
 class Schedule(db.Model):
+    __table_args__ = (db.Index('ix_schedule_dept_date', 'target_dept', 'date'),)
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     target_dept = db.Column(db.String(50))
-    date = db.Column(db.String(20))
+    date = db.Column(db.Date)
     time = db.Column(db.String(20))
     mode = db.Column(db.String(20))
     created_by = db.Column(db.String(50))
@@ -87,41 +103,73 @@ class Schedule(db.Model):
 @login_manager.user_loader
 def load_user(user_id): return User.query.get(int(user_id))
 
-# --- NOTIFICATIONS ---
-@app.context_processor
-def inject_notifications():
-    if not current_user.is_authenticated: return dict(notifications=[])
-    if session.get('notifications_cleared'): return dict(notifications=[])
+# --- CACHED LOOKUPS ---
+# Departments change rarely and staff slowly; nearly every route renders one or
+# both lists, so serve them from the cache and invalidate on the write paths.
+@cache.cached(timeout=600, key_prefix='departments')
+def get_departments(): return Department.query.all()
+
+@cache.cached(timeout=600, key_prefix='staff')
+def get_staff():
+    # Plain column rows: templates only read these six fields, and namedtuples
+    # skip ORM attribute instrumentation and cache cleanly across requests.
+    return db.session.query(User.id, User.username, User.full_name, User.role, User.department, User.designation).all()
 
+# --- NOTIFICATIONS ---
+@cache.memoize(timeout=60)
+def _compute_alerts(user_id, dept, today):
+    # Keyed on (user, dept, day) so repeated requests skip both queries until a
+    # task/schedule mutation invalidates the cache or the date rolls over.
     alerts = []
-    today = datetime.now().strftime('%Y-%m-%d')
-    
-    my_tasks = Task.query.filter_by(assignee=current_user.username).filter(Task.status != 'Completed').all()
+
+    my_tasks = Task.query.filter_by(assignee_id=user_id).filter(Task.status != 'Completed').all()
     for t in my_tasks:
         if t.deadline < today: alerts.append(f"OVERDUE: {t.title}")
         elif t.deadline == today: alerts.append(f"DUE TODAY: {t.title}")
-    
-    schedules = Schedule.query.filter((Schedule.target_dept == 'All') | (Schedule.target_dept == current_user.department)).all()
+
+    schedules = Schedule.query.filter((Schedule.target_dept == 'All') | (Schedule.target_dept == dept)).all()
     for s in schedules:
         if s.date == today: alerts.append(f"MEETING TODAY: {s.title} @ {s.time}")
         elif s.date > today: alerts.append(f"UPCOMING: {s.title} ({s.date})")
-    
-    return dict(notifications=alerts)
+
+    return alerts
+
+@app.context_processor
+def inject_notifications():
+    if not current_user.is_authenticated: return dict(notifications=[])
+    if session.get('notifications_cleared'): return dict(notifications=[])
+    # Dashboards render several partials; compute the alerts once per request.
+    if '_notifications' not in g:
+        g._notifications = _compute_alerts(current_user.id, current_user.department, date.today())
+    return dict(notifications=g._notifications)
 
 # --- ROUTES ---
 @app.route('/')
 def index(): return render_template('index.html')
 
+# Usernames with repeated recent failures skip the DB lookup for five minutes,
+# keeping credential-stuffing bursts off the User table.
+failed_logins = TTLCache(maxsize=10_000, ttl=300)
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
-        user = User.query.filter_by(username=request.form['username']).first()
-        if user and bcrypt.check_password_hash(user.password_hash, request.form['password']):
-            login_user(user)
-            session['notifications_cleared'] = False
-            if user.role == 'Admin': return redirect(url_for('admin_dashboard'))
-            if user.role == 'Leader': return redirect(url_for('leader_dashboard'))
-            return redirect(url_for('employee_dashboard'))
+        username = request.form['username']
+        if failed_logins.get(username, 0) > 5:
+            flash('Invalid Credentials', 'danger')
+            return render_template('login.html')
+        user = User.query.filter_by(username=username).first()
+        if user:
+            # Real accounts are never throttled; a wrong password is not stuffing.
+            failed_logins.pop(username, None)
+            if bcrypt.check_password_hash(user.password_hash, request.form['password']):
+                login_user(user)
+                session['notifications_cleared'] = False
+                if user.role == 'Admin': return redirect(url_for('admin_dashboard'))
+                if user.role == 'Leader': return redirect(url_for('leader_dashboard'))
+                return redirect(url_for('employee_dashboard'))
+        else:
+            failed_logins[username] = failed_logins.get(username, 0) + 1
         flash('Invalid Credentials', 'danger')
     return render_template('login.html')
 
@@ -140,15 +188,16 @@ def clear_notifications():
 @login_required
 def leader_dashboard():
     if current_user.role not in ['Leader', 'Admin']: return abort(403)
-    assigned_tasks = Task.query.filter_by(assigner=current_user.full_name).all()
-    my_tasks = Task.query.filter_by(assignee=current_user.username).all()
+    assigned_tasks = Task.query.filter_by(assigner_id=current_user.id).all()
+    my_tasks = Task.query.filter_by(assignee_id=current_user.id).all()
     team_logs = Meeting.query.filter_by(department=current_user.department).all()
-    staff = User.query.all()
-    depts = Department.query.all()
-    today = datetime.now().strftime('%Y-%m-%d')
+    staff = get_staff()
+    depts = get_departments()
+    today = date.today()
     schedules = Schedule.query.filter(((Schedule.target_dept == 'All') | (Schedule.target_dept == current_user.department)) & (Schedule.date >= today)).all()
-    total = len(assigned_tasks)
-    done = len([t for t in assigned_tasks if t.status == 'Completed'])
+    status_counts = dict(db.session.query(Task.status, db.func.count()).filter_by(assigner_id=current_user.id).group_by(Task.status).all())
+    total = sum(status_counts.values())
+    done = status_counts.get('Completed', 0)
     rate = int((done/total)*100) if total > 0 else 0
     return render_template('dashboard_leader.html', assigned_tasks=assigned_tasks, my_tasks=my_tasks, team_logs=team_logs, staff=staff, depts=depts, schedules=schedules, analytics={'rate': rate, 'total': total}, user=current_user)
 
@@ -156,29 +205,32 @@ def leader_dashboard():
 @login_required
 def admin_dashboard():
     if current_user.role != 'Admin': return redirect(url_for('employee_dashboard'))
-    tasks = Task.query.all()
-    staff = User.query.all()
-    depts = Department.query.all()
-    total = len(tasks)
-    pending = len([t for t in tasks if t.status != 'Completed'])
-    return render_template('dashboard_admin.html', tasks=tasks, staff=staff, depts=depts, stats={'total': total, 'pending': pending, 'completed': total-pending}, user=current_user)
+    # The table shows the 50 most recent tasks; the stats cover everything via the aggregate below.
+    tasks = Task.query.order_by(Task.id.desc()).limit(50).all()
+    staff = get_staff()
+    depts = get_departments()
+    status_counts = dict(db.session.query(Task.status, db.func.count()).group_by(Task.status).all())
+    total = sum(status_counts.values())
+    completed = status_counts.get('Completed', 0)
+    return render_template('dashboard_admin.html', tasks=tasks, staff=staff, depts=depts, stats={'total': total, 'pending': total-completed, 'completed': completed}, user=current_user)
 
 @app.route('/employee_dashboard')
 @login_required
 def employee_dashboard():
-    all_meetings = Meeting.query.all()
-    attended = [m for m in all_meetings if current_user.full_name in m.attendees]
-    missed = [m for m in all_meetings if current_user.full_name in m.absentees]
-    today = datetime.now().strftime('%Y-%m-%d')
-    my_tasks = Task.query.filter_by(assignee=current_user.username).all()
+    attended = Meeting.query.filter(Meeting.attendees.like(f"%{current_user.full_name}%")).all()
+    missed_count = Meeting.query.filter(Meeting.absentees.like(f"%{current_user.full_name}%")).count()
+    today = date.today()
+    my_tasks = Task.query.filter_by(assignee_id=current_user.id).all()
     schedules = Schedule.query.filter(((Schedule.target_dept == 'All') | (Schedule.target_dept == current_user.department)) & (Schedule.date >= today)).all()
-    return render_template('dashboard_employee.html', user=current_user, meetings=attended, tasks=my_tasks, schedules=schedules, stats={'attended': len(attended), 'missed': len(missed)})
+    return render_template('dashboard_employee.html', user=current_user, meetings=attended, tasks=my_tasks, schedules=schedules, stats={'attended': len(attended), 'missed': missed_count})
 
 @app.route('/schedule_meeting', methods=['POST'])
 @login_required
 def schedule_meeting():
-    db.session.add(Schedule(title=request.form['title'], target_dept=request.form['target_dept'], date=request.form['date'], time=request.form['time'], mode=request.form['mode'], created_by=current_user.full_name))
+    db.session.add(Schedule(title=request.form['title'], target_dept=request.form['target_dept'], date=datetime.strptime(request.form['date'], '%Y-%m-%d').date(), time=request.form['time'], mode=request.form['mode'], created_by=current_user.full_name))
     db.session.commit()
+    cache.delete_memoized(_compute_alerts)
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest': return ('', 204)
     flash('Meeting Scheduled!', 'success')
     return redirect(request.referrer)
 
@@ -187,72 +239,103 @@ def schedule_meeting():
 def log_meeting():
     if request.method == 'POST':
         db.session.add(Meeting(
-            date_of_meeting=request.form.get('Date_of_Meeting'), department=request.form.get('Department'), department_head=request.form.get('Department_Head'),
+            date_of_meeting=datetime.strptime(request.form.get('Date_of_Meeting'), '%Y-%m-%d').date(), department=request.form.get('Department'), department_head=request.form.get('Department_Head'),
             meeting_type=request.form.get('Meeting_Type', 'General'), mode=request.form.get('Meeting_Mode'), objective=request.form.get('Objective'),
             agenda=request.form.get('Agenda', 'N/A'), attendees=", ".join(request.form.getlist('Attendees')), absentees=", ".join(request.form.getlist('Absentees')),
+            attendee_count=len(request.form.getlist('Attendees')), absentee_count=len(request.form.getlist('Absentees')),
             key_decisions=request.form.get('Key_Decisions', 'None'), action_items=request.form.get('Action_Items', 'None'), 
             productive=request.form.get('Productive'), submitted_by=request.form.get('Submitted_By')
         ))
         db.session.commit()
         flash('Meeting Logged Successfully!', 'success')
         return redirect(url_for('log_meeting'))
-    staff = User.query.all()
-    depts = Department.query.all()
+    staff = get_staff()
+    depts = get_departments()
     heads = [u for u in staff if u.role in ['Leader', 'Admin']]
     return render_template('dashboard_form.html', staff_list=staff, dept_heads=heads, depts=depts, user=current_user)
 
 @app.route('/assign_task', methods=['POST'])
 @login_required
 def assign_task():
-    assignee = User.query.filter_by(username=request.form['assignee']).first()
-    db.session.add(Task(title=request.form['title'], description='', assigner=current_user.full_name, assignee=request.form['assignee'], department=assignee.department if assignee else "General", deadline=request.form['deadline'], status='Pending'))
+    try:
+        assignee_id = int(request.form['assignee'])
+    except ValueError:
+        assignee_id = None
+    # A PK get is cheap and keeps forged or stale ids from violating the FK at commit time.
+    if assignee_id is None or db.session.get(User, assignee_id) is None:
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest': return ('', 400)
+        flash('Unknown assignee.', 'danger')
+        return redirect(request.referrer)
+    db.session.add(Task(title=request.form['title'], description='', assigner=current_user.full_name, assigner_id=current_user.id, assignee_id=assignee_id, deadline=datetime.strptime(request.form['deadline'], '%Y-%m-%d').date(), status='Pending'))
     db.session.commit()
+    cache.delete_memoized(_compute_alerts)
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest': return ('', 204)
     flash('Task Assigned!', 'success')
     return redirect(request.referrer)
 
 @app.route('/delete_task/<int:id>', methods=['POST'])
 @login_required
 def delete_task(id):
-    db.session.delete(Task.query.get_or_404(id)); db.session.commit()
+    if db.session.execute(db.delete(Task).where(Task.id == id)).rowcount == 0: abort(404)
+    db.session.commit()
+    cache.delete_memoized(_compute_alerts)
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest': return ('', 204)
     return redirect(request.referrer)
 
 @app.route('/clear_leader_tasks', methods=['POST'])
 @login_required
 def clear_leader_tasks():
-    Task.query.filter_by(assigner=current_user.full_name).delete(); db.session.commit()
+    Task.query.filter_by(assigner_id=current_user.id).delete(); db.session.commit()
+    cache.delete_memoized(_compute_alerts)
     return redirect(request.referrer)
 
 @app.route('/update_status/<int:id>/<new_status>')
 @login_required
 def update_status(id, new_status):
-    t = Task.query.get_or_404(id); t.status = new_status
-    if new_status == 'Completed': t.completion_date = datetime.now().strftime('%Y-%m-%d')
+    values = {'status': new_status}
+    if new_status == 'Completed': values['completion_date'] = datetime.now().strftime('%Y-%m-%d')
+    if db.session.execute(db.update(Task).where(Task.id == id).values(**values)).rowcount == 0: abort(404)
     db.session.commit()
+    cache.delete_memoized(_compute_alerts)
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest': return ('', 204)
     return redirect(request.referrer)
 
+_default_pw_hash = None
+
+def default_pw_hash():
+    # bcrypt costs ~250ms per hash; compute the "welcome123" fallback once and re-use it.
+    global _default_pw_hash
+    if _default_pw_hash is None: _default_pw_hash = bcrypt.generate_password_hash("welcome123").decode('utf-8')
+    return _default_pw_hash
+
 @app.route('/manage_staff', methods=['GET', 'POST'])
 @login_required
 def manage_staff():
     if current_user.role != 'Admin': return abort(403)
     if request.method == 'POST':
-        try:
-            hashed = bcrypt.generate_password_hash(request.form['password'] or "welcome123").decode('utf-8')
+        # Check the username before hashing so a duplicate submission skips the bcrypt work.
+        if not User.query.filter_by(username=request.form['username']).first():
+            hashed = bcrypt.generate_password_hash(request.form['password']).decode('utf-8') if request.form['password'] else default_pw_hash()
             db.session.add(User(username=request.form['username'], password_hash=hashed, full_name=request.form['fullname'], role=request.form['role'], designation=request.form['designation'], department=request.form['department']))
             db.session.commit()
-        except: pass
-    return render_template('manage_staff.html', staff=User.query.all(), depts=Department.query.all())
+            cache.delete('staff')
+    return render_template('manage_staff.html', staff=get_staff(), depts=get_departments())
 
 @app.route('/edit_user/<int:id>', methods=['POST'])
 @login_required
 def edit_user(id):
-    u = User.query.get_or_404(id); u.full_name = request.form['fullname']; u.role = request.form['role']; u.department = request.form['department']; db.session.commit()
+    if db.session.execute(db.update(User).where(User.id == id).values(full_name=request.form['fullname'], role=request.form['role'], department=request.form['department'])).rowcount == 0: abort(404)
+    db.session.commit()
+    cache.delete('staff')
     return redirect(url_for('manage_staff'))
 
 @app.route('/delete_user/<int:id>', methods=['POST'])
 @login_required
 def delete_user(id):
-    u = User.query.get_or_404(id); 
-    if u.id != current_user.id: db.session.delete(u); db.session.commit()
+    if id != current_user.id:
+        if db.session.execute(db.delete(User).where(User.id == id)).rowcount == 0: abort(404)
+        db.session.commit()
+        cache.delete('staff')
     return redirect(url_for('manage_staff'))
 
 @app.route('/add_department', methods=['POST'])
@@ -261,6 +344,7 @@ def add_department():
     if current_user.role != 'Admin': return abort(403)
     if not Department.query.filter_by(name=request.form['dept_name']).first():
         db.session.add(Department(name=request.form['dept_name'])); db.session.commit()
+        cache.delete('departments')
     return redirect(url_for('manage_staff'))
 
 @app.route('/meeting_analytics')
@@ -268,22 +352,26 @@ def add_department():
 def meeting_analytics():
     dept = request.args.get('dept', 'All')
     month = request.args.get('month')
-    query = Meeting.query
-    if dept != 'All': query = query.filter_by(department=dept)
-    if month: query = query.filter(Meeting.date_of_meeting.like(f"{month}%"))
-    meetings = query.all()
-    
-    depts_list = Department.query.all()
-    total_logs = len(meetings)
-    productive = len([m for m in meetings if m.productive == 'Yes'])
+    filters = []
+    if dept != 'All': filters.append(Meeting.department == dept)
+    if month:
+        # month arrives as YYYY-MM; a half-open range keeps the date index usable.
+        # A malformed value is simply ignored rather than 500ing the page.
+        try:
+            start = datetime.strptime(month, '%Y-%m').date()
+            end = date(start.year + 1, 1, 1) if start.month == 12 else date(start.year, start.month + 1, 1)
+            filters.append(Meeting.date_of_meeting >= start)
+            filters.append(Meeting.date_of_meeting < end)
+        except ValueError:
+            pass
+    meetings = db.session.query(Meeting.id, Meeting.date_of_meeting, Meeting.department, Meeting.objective, Meeting.submitted_by, Meeting.key_decisions, Meeting.action_items, Meeting.attendees, Meeting.absentees, Meeting.productivity_reason).filter(*filters).all()
+
+    depts_list = get_departments()
+    total_logs, productive = db.session.query(db.func.count(), db.func.coalesce(db.func.sum(db.case((Meeting.productive == 'Yes', 1), else_=0)), 0)).filter(*filters).one()
     efficiency = int((productive/total_logs)*100) if total_logs > 0 else 0
-    
-    dept_counts = {}
-    absentee_counts = {}
-    for m in meetings:
-        dept_counts[m.department] = dept_counts.get(m.department, 0) + 1
-        count = len([x for x in m.absentees.split(',') if x.strip()])
-        absentee_counts[m.department] = absentee_counts.get(m.department, 0) + count
+
+    dept_counts = dict(db.session.query(Meeting.department, db.func.count()).filter(*filters).group_by(Meeting.department).all())
+    absentee_counts = dict(db.session.query(Meeting.department, db.func.coalesce(db.func.sum(Meeting.absentee_count), 0)).filter(*filters).group_by(Meeting.department).all())
 
     sorted_absent = sorted(absentee_counts.items(), key=lambda x: x[1])
     best_attendance = sorted_absent[0][0] if sorted_absent else "N/A"
@@ -297,12 +385,18 @@ def meeting_analytics():
 @app.route('/export_analytics')
 @login_required
 def export_analytics():
+    # xlsxwriter is only needed here; importing lazily keeps it off the cold-start path
+    import xlsxwriter
+    from io import BytesIO
     dept = request.args.get('dept', 'All')
-    meetings = Meeting.query.all()
-    data = [{'Date': m.date_of_meeting, 'Dept': m.department, 'Head': m.department_head, 'Objective': m.objective, 'Decisions': m.key_decisions, 'Absentees': m.absentees, 'Action Items': m.action_items, 'Productive': m.productive} for m in meetings]
-    df = pd.DataFrame(data)
+    rows = db.session.execute(db.select(Meeting.date_of_meeting, Meeting.department, Meeting.department_head, Meeting.objective, Meeting.key_decisions, Meeting.absentees, Meeting.action_items, Meeting.productive).execution_options(yield_per=500))
     output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer: df.to_excel(writer, index=False)
+    # constant_memory keeps only the current row block in memory while writing
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd'})
+    worksheet = workbook.add_worksheet()
+    worksheet.write_row(0, 0, ['Date', 'Dept', 'Head', 'Objective', 'Decisions', 'Absentees', 'Action Items', 'Productive'])
+    for i, row in enumerate(rows, start=1): worksheet.write_row(i, 0, row)
+    workbook.close()
     output.seek(0)
     return send_file(output, download_name=f"EduLog_{dept}.xlsx", as_attachment=True)
 
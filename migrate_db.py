@@ -1,3 +1,5 @@
+import io
+
 import pandas as pd
 from sqlalchemy import create_engine, text
 
@@ -17,34 +19,33 @@ def migrate_data():
     
     # Tables to copy (Order matters!)
     tables = ['department', 'user', 'meeting', 'task', 'schedule']
-    
-    with cloud_engine.connect() as conn:
+
+    # One transaction for the whole migration: the empty tables created by
+    # init_db are truncated and refilled via COPY, and everything commits
+    # (or rolls back) together instead of once per table.
+    with cloud_engine.begin() as conn:
         print("Cleaning empty cloud tables...")
-        # We use TRUNCATE to clear the empty tables created by init_db
-        # so we can fill them with your old data.
         for table in reversed(tables):
-            try:
-                conn.execute(text(f'TRUNCATE TABLE "{table}" RESTART IDENTITY CASCADE;'))
-                conn.commit()
-            except Exception as e:
-                print(f"Note: Could not truncate {table} (it might be empty or missing).")
-
-    for table in tables:
-        print(f"Migrating table: {table}...")
-        try:
+            conn.execute(text(f'TRUNCATE TABLE "{table}" RESTART IDENTITY CASCADE;'))
+
+        cursor = conn.connection.cursor()
+        for table in tables:
+            print(f"Migrating table: {table}...")
             # Read from Local SQLite
             df = pd.read_sql_table(table, local_engine)
-            
+
             if df.empty:
                 print(f"   -> Table {table} is empty locally. Skipping.")
                 continue
-            
-            # Write to Cloud Postgres
-            df.to_sql(table, cloud_engine, if_exists='append', index=False)
+
+            # Stream into Cloud Postgres via COPY — one bulk statement per
+            # table instead of row-by-row INSERTs from to_sql.
+            buf = io.StringIO()
+            df.to_csv(buf, index=False, header=False)
+            buf.seek(0)
+            columns = ', '.join(f'"{c}"' for c in df.columns)
+            cursor.copy_expert(f'COPY "{table}" ({columns}) FROM STDIN WITH CSV', buf)
             print(f"   -> Successfully copied {len(df)} rows.")
-            
-        except Exception as e:
-            print(f"   -> Error migrating {table}: {e}")
 
     print("--- MIGRATION COMPLETE ---")
 